@@ -73,9 +73,9 @@ datumtransformation
     annual change of the parameters.
 
 main
-    Contains the *convert_fn()* and *convert()* functions, as well as
-    a table of predefined transforms *TRANSFORM_TABLE*, for supporting
-    these functions.
+    Contains the *convert_fn()*, *convert()*, and
+    *convert_all_frames()* functions, as well as a table of predefined
+    transforms *TRANSFORM_TABLE*, for supporting these functions.
 
 '''
 
@@ -87,6 +87,6 @@ except ImportError: # for Python<3.8
 __version__ = metadata.version('etrs-itrs')
 
 try:
-    from etrsitrs.main import convert, convert_fn
+    from etrsitrs.main import convert, convert_fn, convert_all_frames
 except ImportError:
-    from main import convert, convert_fn
+    from main import convert, convert_fn, convert_all_frames
@@ -0,0 +1,194 @@
+r'''
+The *_kernels* module contains *apply_affine()*, which applies an
+affine map :math:`b + A x` to N coordinates in a single pass, written
+out in terms of the twelve elements of *A* and *b*. Both the forward-
+and the reverse transform reduce to such a map. If every coordinate
+has its own epoch, *propagate_and_apply()* propagates the parameters
+and transforms the coordinate in the same pass.
+
+As plain Python functions they are slow. If numba is installed,
+*compiled_apply_affine()* and *compiled_propagate_and_apply()* compile
+them to machine code that distributes the coordinates over all
+available cores. *HAVE_NUMBA* tells whether numba is installed; if
+it turns out not to work, for example because it does not support
+the installed numpy, the compiled_*() functions return None and
+callers fall back to numpy. Importing numba and loading a kernel
+takes of order 0.1 s, which is why this only happens on first use,
+and why callers only use the compiled kernels for large arrays.
+'''
+
+from importlib.util import find_spec
+
+from numpy import empty, identity, zeros
+
+HAVE_NUMBA = find_spec('numba') is not None
+
+# Replaced by numba.prange in _compiled(), before numba compiles the
+# kernels below.
+prange = range
+
+# Maps kernel names onto their compiled versions, or onto None if
+# numba could not compile them.
+_COMPILED_KERNELS = {}
+
+
+
+def _compiled(kernel, example_args):
+    r'''
+    Returns *kernel* compiled with numba, or None if numba is not
+    installed or does not work. The kernel is compiled on first use,
+    by calling it with *example_args*, so that compilation errors
+    surface here rather than in the caller.
+    '''
+    name = kernel.__name__
+    if name not in _COMPILED_KERNELS:
+        _COMPILED_KERNELS[name] = None
+        try:
+            import numba
+            global prange
+            prange   = numba.prange
+            compiled = numba.njit(cache=True, fastmath=True,
+                                  parallel=True)(kernel)
+            compiled(*example_args)
+        # Besides ImportError, a numba that does not match the
+        # installed numpy or LLVM may raise about anything.
+        except Exception:
+            return None
+        _COMPILED_KERNELS[name] = compiled
+    return _COMPILED_KERNELS[name]
+
+
+
+def compiled_apply_affine():
+    r'''
+    **Returns**
+
+    *apply_affine()*, compiled with numba, or None if numba is not
+    installed or does not work.
+    '''
+    return _compiled(apply_affine,
+                     (zeros((1, 3)), identity(3), zeros(3), empty((1, 3))))
+
+
+
+def compiled_propagate_and_apply():
+    r'''
+    **Returns**
+
+    *propagate_and_apply()*, compiled with numba, or None if numba is
+    not installed or does not work.
+    '''
+    return _compiled(propagate_and_apply,
+                     (zeros((1, 3)), zeros(1), zeros(7), zeros(7), 2000.0,
+                      True, empty((1, 3))))
+
+
+
+def apply_affine(xyz_m, full_matrix, offset_m, result):
+    r'''
+    Computes *offset_m + full_matrix xyz_m* for N coordinates. The
+    transformed coordinates are written to *result*, which may be
+    *xyz_m* itself.
+
+    **Parameters**
+
+    xyz_m : numpy.array of shape (N, 3)
+        The coordinates to transform in meters.
+
+    full_matrix : numpy.array of shape (3, 3)
+        The matrix *A*, for example :math:`I + M`.
+
+    offset_m : numpy.array of 3 floats
+        The offset *b*, for example (T1, T2, T3).
+
+    result : numpy.array of shape (N, 3)
+        Output array.
+
+    **Examples**
+
+    >>> from numpy import array, empty_like
+    >>> from etrsitrs.parameterset import transform_matrix
+    >>> xyz = array([[3370658.542, 711877.138, 5349786.952]])
+    >>> result = empty_like(xyz)
+    >>> full_matrix = transform_matrix(1.0 + 1.34e-09,
+    ...     [4.31968990e-09, 2.61314574e-08, -4.22369679e-08])
+    >>> apply_affine(xyz, full_matrix, array([0.0521, 0.0493, -0.0585]),
+    ...              result)
+    >>> print('%.3f, %.3f, %.3f' % tuple(result[0]))
+    3370658.768, 711877.023, 5349786.816
+    '''
+    a_11, a_12, a_13 = full_matrix[0, 0], full_matrix[0, 1], full_matrix[0, 2]
+    a_21, a_22, a_23 = full_matrix[1, 0], full_matrix[1, 1], full_matrix[1, 2]
+    a_31, a_32, a_33 = full_matrix[2, 0], full_matrix[2, 1], full_matrix[2, 2]
+    t_1, t_2, t_3    = offset_m[0], offset_m[1], offset_m[2]
+    for i in prange(xyz_m.shape[0]):
+        x_m, y_m, z_m = xyz_m[i, 0], xyz_m[i, 1], xyz_m[i, 2]
+        result[i, 0] = t_1 + a_11*x_m + a_12*y_m + a_13*z_m
+        result[i, 1] = t_2 + a_21*x_m + a_22*y_m + a_23*z_m
+        result[i, 2] = t_3 + a_31*x_m + a_32*y_m + a_33*z_m
+
+
+
+def propagate_and_apply(xyz_m, epochs, parameter_vector, rate_vector,
+                        ref_epoch, forward, result):
+    r'''
+    Transforms coordinate *xyz_m[i]* with the parameters propagated to
+    *epochs[i]*, for all N coordinates. The transformed coordinates
+    are written to *result*, which may be *xyz_m* itself.
+
+    **Parameters**
+
+    xyz_m : numpy.array of shape (N, 3)
+        The coordinates to transform in meters.
+
+    epochs : numpy.array of N floats
+        The epoch of each coordinate in years.
+
+    parameter_vector : numpy.array of 7 floats
+        (T1, T2, T3, D, R1, R2, R3) at *ref_epoch*, in meters and
+        radians.
+
+    rate_vector : numpy.array of 7 floats
+        Their annual rates of change.
+
+    ref_epoch : float
+        The epoch at which *parameter_vector* is valid.
+
+    forward : bool
+        True for the forward transform, False for the reverse one.
+
+    result : numpy.array of shape (N, 3)
+        Output array.
+
+    **Examples**
+
+    >>> from numpy import array, empty_like
+    >>> xyz = array([[3370658.542, 711877.138, 5349786.952]])
+    >>> result = empty_like(xyz)
+    >>> propagate_and_apply(xyz, array([2005.0]),
+    ...     array([0.0521, 0.0493, -0.0585, 1.34e-09,
+    ...            4.31968990e-09, 2.61314574e-08, -4.22369679e-08]),
+    ...     array([0.0001, 0.0001, -0.0018, 8.0e-11,
+    ...            3.92699082e-10, 2.37558704e-09, -3.83972435e-09]),
+    ...     2000.0, True, result)
+    >>> print('%.3f, %.3f, %.3f' % tuple(result[0]))
+    3370658.848, 711876.948, 5349786.770
+    '''
+    sign = 1.0 if forward else -1.0
+    for i in prange(xyz_m.shape[0]):
+        years  = epochs[i] - ref_epoch
+        t_1    = parameter_vector[0] + rate_vector[0]*years
+        t_2    = parameter_vector[1] + rate_vector[1]*years
+        t_3    = parameter_vector[2] + rate_vector[2]*years
+        term_d = sign*(parameter_vector[3] + rate_vector[3]*years)
+        r_1    = sign*(parameter_vector[4] + rate_vector[4]*years)
+        r_2    = sign*(parameter_vector[5] + rate_vector[5]*years)
+        r_3    = sign*(parameter_vector[6] + rate_vector[6]*years)
+        x_m, y_m, z_m = xyz_m[i, 0], xyz_m[i, 1], xyz_m[i, 2]
+        if not forward:
+            # (I - M)(x - T)
+            x_m, y_m, z_m = x_m - t_1, y_m - t_2, z_m - t_3
+            t_1, t_2, t_3 = 0.0, 0.0, 0.0
+        result[i, 0] = x_m + t_1 + term_d*x_m - r_3*y_m + r_2*z_m
+        result[i, 1] = y_m + t_2 + r_3*x_m + term_d*y_m - r_1*z_m
+        result[i, 2] = z_m + t_3 - r_2*x_m + r_1*y_m + term_d*z_m
@@ -4,17 +4,64 @@ implemented in the *forward_transform()* and *reverse_transform()*
 functions, as well as the *DatumTransformation* class, which manages
 rates of change of parameters and wraps the forward- and reverse-
 transforms.
+
+All arithmetic is carried out in double precision. The correction
+term :math:`M x` is only of order decimetres and would be accurate to
+well below a micrometre in single precision, but casting N coordinates
+to float32 and the result back to float64 costs more memory traffic
+than the narrower matrix product saves: for :math:`10^6` coordinates
+the mixed precision variant took 20 ms against 11 ms for the plain
+float64 one.
 '''
 
-from numpy import dot
+from itertools import count
+
+from numpy import (array, asarray, ascontiguousarray, broadcast_to, einsum,
+                   empty_like, float64, identity, matmul, ndim, newaxis, ravel,
+                   shape)
 
 try:
-    from etrsitrs.parameterset import ParameterSet
+    from etrsitrs.parameterset import (ParameterSet, transform_matrix,
+                                       transform_matrices)
+    from etrsitrs._kernels import (HAVE_NUMBA, compiled_apply_affine,
+                                   compiled_propagate_and_apply)
 except ImportError:
-    from parameterset import ParameterSet
+    from parameterset import (ParameterSet, transform_matrix,
+                              transform_matrices)
+    from _kernels import (HAVE_NUMBA, compiled_apply_affine,
+                          compiled_propagate_and_apply)
+
 
+# Half the number of (epoch, direction) affine maps that a
+# DatumTransformation keeps, see _affine_for_epoch().
+EPOCH_CACHE_SIZE = 32
+# Smallest number of coordinates for which conversion functions use
+# the numba kernel, if available. Below this, numpy is fast enough
+# that importing numba and loading the kernel does not pay off.
+NUMBA_MIN_POINTS = 50000
+_IDENTITY = identity(3)
+# Source of DatumTransformation._version numbers.
+_VERSIONS = count()
 
-def forward_transform(xyz_m, translate_m, rotation_matrix):
+
+
+def _use_kernel(xyz_m, out=None):
+    r'''
+    Returns True if *xyz_m* and *out* should go through a numba kernel:
+    numba is available, *xyz_m* is a large (N, 3) array, and *out* is
+    either None or a C-contiguous float64 array of the same shape. The
+    kernels do no bounds or type checking of their own, so anything
+    else is left to numpy, which raises on bad shapes and types.
+    '''
+    if (not HAVE_NUMBA or ndim(xyz_m) != 2 or shape(xyz_m)[1] != 3 or
+            len(xyz_m) < NUMBA_MIN_POINTS):
+        return False
+    return out is None or (out.shape == shape(xyz_m) and
+                           out.dtype == float64 and
+                           out.flags.c_contiguous)
+
+
+def forward_transform(xyz_m, translate_m, rotation_matrix, out=None):
     r''' Transform *xyz_m* given a translation vector and a rotation
     matrix. Only use *translate_m* and *matrix* from the
     *ParameterSet* returned by *propagate_parameters()*. Implements
@@ -34,8 +81,9 @@ def forward_transform(xyz_m, translate_m, rotation_matrix):
     
     **Parameters**
     
-    xyz_m : numpy.array of length 3
-        The coordinates to transform in meters.
+    xyz_m : numpy.array of shape (3,) or (N, 3)
+        The coordinates to transform in meters. Either a single
+        coordinate, or N coordinates, one per row.
     
     translate_m : numpy.array of length 3
         Propagated (T1, T2, T3).
@@ -44,10 +92,15 @@ def forward_transform(xyz_m, translate_m, rotation_matrix):
         The rotation matrix obtained by calling the
         *ParameterSet.matrix()* method on the result of
         *propagate_parameters()*.
+
+    out : numpy.array of the same shape as *xyz_m*, optional
+        If given, the result is written to *out* instead of a newly
+        allocated array. It may be *xyz_m* itself.
     
     **Returns**
     
-    A numpy.array of length 3 with the transformed coordinates.
+    A numpy.array of the same shape as *xyz_m* with the transformed
+    coordinates. This is *out* if it is given.
 
     **Examples**
 
@@ -63,12 +116,43 @@ def forward_transform(xyz_m, translate_m, rotation_matrix):
     ...                                     parameters.matrix())
     >>> print('%.3f, %.3f, %.3f' % tuple(onsala_etrf2000))
     3370658.768, 711877.023, 5349786.816
-    '''        
-    return xyz_m + translate_m + dot(rotation_matrix, xyz_m)
-
 
+    Many coordinates are transformed at once by stacking them in an
+    (N, 3) array:
 
-def reverse_transform(xyz_m, translate_m, rotation_matrix):
+    >>> stations_itrf2008 = array([onsala_itrf2008, 2*onsala_itrf2008])
+    >>> stations_etrf2000 = forward_transform(stations_itrf2008,
+    ...                                       parameters.translate_m,
+    ...                                       parameters.matrix())
+    >>> for xyz in stations_etrf2000:
+    ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+    3370658.768, 711877.023, 5349786.816
+    6741317.485, 1423753.996, 10699573.690
+    '''
+    if ndim(xyz_m) == 1:
+        # A 3x3 matrix-vector product is dominated by numpy's dispatch
+        # overhead. Plain float arithmetic is considerably faster.
+        x_m, y_m, z_m = asarray(xyz_m, dtype=float).tolist()
+        t_1, t_2, t_3 = asarray(translate_m, dtype=float).tolist()
+        ((m_11, m_12, m_13),
+         (m_21, m_22, m_23),
+         (m_31, m_32, m_33)) = asarray(rotation_matrix, dtype=float).tolist()
+        result = [x_m + t_1 + m_11*x_m + m_12*y_m + m_13*z_m,
+                  y_m + t_2 + m_21*x_m + m_22*y_m + m_23*z_m,
+                  z_m + t_3 + m_31*x_m + m_32*y_m + m_33*z_m]
+        if out is None:
+            return array(result)
+        out[:] = result
+        return out
+    # Adding the identity to the 3x3 matrix once is cheaper than
+    # adding xyz_m to the N rows of the result.
+    result = matmul(xyz_m, (_IDENTITY + rotation_matrix).T, out=out)
+    result += translate_m
+    return result
+
+
+
+def reverse_transform(xyz_m, translate_m, rotation_matrix, out=None):
     r'''
     The opposite of *forward_transform()*. Transform xyz given a
     translation vector and a rotation matrix. Only use *translate_m*
@@ -91,8 +175,9 @@ def reverse_transform(xyz_m, translate_m, rotation_matrix):
     
     **Parameters**
     
-    xyz_m : numpy.array of length 3
-        The coordinates to transform in meters.
+    xyz_m : numpy.array of shape (3,) or (N, 3)
+        The coordinates to transform in meters. Either a single
+        coordinate, or N coordinates, one per row.
     
     translate_m : numpy.array of length 3
         Propagated (T1, T2, T3).
@@ -102,11 +187,13 @@ def reverse_transform(xyz_m, translate_m, rotation_matrix):
         *ParameterSet.matrix()* method on the result of
         *propagate_parameters()*.
 
-    **Returns**
+    out : numpy.array of the same shape as *xyz_m*, optional
+        See *forward_transform()*.
 
-    A numpy.array of length 3 with the transformed coordinates.
+    **Returns**
 
-    **Examples**
+    A numpy.array of the same shape as *xyz_m* with the transformed
+    coordinates. This is *out* if it is given.
 
     **Examples**
 
@@ -124,8 +211,76 @@ def reverse_transform(xyz_m, translate_m, rotation_matrix):
     3370658.542, 711877.138, 5349786.952
 
     '''
-    return xyz_m - translate_m - dot(rotation_matrix, xyz_m - translate_m)
+    if ndim(xyz_m) == 1:
+        x_m, y_m, z_m = asarray(xyz_m, dtype=float).tolist()
+        t_1, t_2, t_3 = asarray(translate_m, dtype=float).tolist()
+        ((m_11, m_12, m_13),
+         (m_21, m_22, m_23),
+         (m_31, m_32, m_33)) = asarray(rotation_matrix, dtype=float).tolist()
+        dx_m, dy_m, dz_m = x_m - t_1, y_m - t_2, z_m - t_3
+        result = [dx_m - m_11*dx_m - m_12*dy_m - m_13*dz_m,
+                  dy_m - m_21*dx_m - m_22*dy_m - m_23*dz_m,
+                  dz_m - m_31*dx_m - m_32*dy_m - m_33*dz_m]
+        if out is None:
+            return array(result)
+        out[:] = result
+        return out
+    # Folding the translation into the offset -(I - M) T avoids an
+    # (N, 3) temporary for xyz_m - translate_m.
+    full_matrix = _IDENTITY - rotation_matrix
+    result  = matmul(xyz_m, full_matrix.T, out=out)
+    result -= matmul(full_matrix, translate_m)
+    return result
+
+
+
+
+def _cuda_convert_fn(full_matrix, offset_m):
+    r'''
+    Returns a function that computes *offset_m + full_matrix xyz_m* for
+    coordinates *xyz_m* on a CUDA GPU with cupy. The affine map is
+    copied to the GPU only once. The function returns a cupy array if
+    *xyz_m* is a cupy array, and a numpy array otherwise.
+    '''
+    import cupy
+    full_matrix_t = cupy.asarray(full_matrix.T)
+    offset_gpu_m  = cupy.asarray(offset_m)
+
+    def convert_function(xyz_m, out=None):
+        r'''
+        Convert *xyz_m*, of shape (3,) or (N, 3), on the GPU. If *out*
+        is given, the result is copied into it.
+        '''
+        on_gpu = isinstance(xyz_m, cupy.ndarray)
+        result = cupy.matmul(cupy.asarray(xyz_m, dtype=float), full_matrix_t)
+        result += offset_gpu_m
+        if out is None:
+            return result if on_gpu else cupy.asnumpy(result)
+        if isinstance(out, cupy.ndarray):
+            out[...] = result
+            return out
+        return cupy.asnumpy(result, out=out)
+    return convert_function
+
+
+
+
+def _attribute(name, doc):
+    r'''
+    Returns a property for public attribute *name* of a
+    *DatumTransformation*, stored in slot *'_' + name*, that rebuilds
+    the derived state when it is assigned.
+    '''
+    slot = '_' + name
+
+    def get_attribute(self):
+        return getattr(self, slot)
 
+    def set_attribute(self, value):
+        setattr(self, slot, value)
+        self._update()
+
+    return property(get_attribute, set_attribute, doc=doc)
 
 
 
@@ -223,10 +378,19 @@ class DatumTransformation(object):
     >>> onsala_itrf2008 = etrf_to_itrf(onsala_etrf2000)
     >>> print('%.3f, %.3f, %.3f' % tuple(onsala_itrf2008))
     3370658.542, 711877.138, 5349786.952
+
+    Conversion functions can write to an existing array, which avoids
+    allocating a new one on every call:
+
+    >>> result = etrf_to_itrf(onsala_etrf2000, out = onsala_itrf2008)
+    >>> result is onsala_itrf2008
+    True
     
     For single use, one can call the *convert* method, which under the
-    hood first creates a conversion function. Note that this is fairly
-    wasteful in terms of cpu cycles:
+    hood first creates a conversion function. The affine map of the
+    propagated parameters is cached per epoch, so repeated calls at
+    the same epoch do not propagate them again, but this is still more
+    wasteful in terms of cpu cycles than reusing a conversion function:
 
     >>> print('%.3f, %.3f, %.3f' %
     ...       tuple(transform.convert(onsala_itrf2008, 'ITRF2008', 'ETRF2000', 2005.0)))
@@ -242,21 +406,58 @@ class DatumTransformation(object):
     ...
     ValueError: No transform 'ETRF2000' -> 'ITRF2005' only 'ETRF2000' <-> 'ITRF2008'.
     '''
+    __slots__ = ('_from_frame', '_to_frame', '_parameters', '_rates',
+                 '_ref_epoch', '_parameter_vector', '_rate_vector',
+                 '_affine_cache', '_directions', '_repr', '_version')
+
     def __init__(self, from_frame, to_frame, parameters, rates, ref_epoch):
-        self.from_frame = from_frame
-        self.to_frame   = to_frame
-        self.parameters = parameters
-        self.rates      = rates
-        self.ref_epoch  = ref_epoch
+        self._from_frame = from_frame
+        self._to_frame   = to_frame
+        self._parameters = parameters
+        self._rates      = rates
+        self._ref_epoch  = ref_epoch
+        self._update()
+
+
+    def _update(self):
+        r'''
+        Rebuilds the state derived from the public attributes. Called
+        on construction and whenever one of them is assigned.
+        '''
+        # Raw copies of the parameters and rates, which let
+        # _affine_for_epoch() skip the ParameterSet arithmetic.
+        self._parameter_vector = self._parameters.vector.copy()
+        self._rate_vector      = self._rates.vector.copy()
+        self._affine_cache     = {}
+        # Maps (from, to) onto True for the forward and False for the
+        # reverse transform.
+        self._directions = {(self._from_frame, self._to_frame): True,
+                            (self._to_frame, self._from_frame): False}
+        self._repr = None
+        # Unique over all instances and changes, so that tables of
+        # transforms can tell whether they need rebuilding.
+        self._version = next(_VERSIONS)
+
+
+    from_frame = _attribute('from_frame', 'Frame from which to transform.')
+    to_frame   = _attribute('to_frame', 'Frame to which to transform.')
+    parameters = _attribute('parameters', 'ParameterSet at *ref_epoch*.')
+    rates      = _attribute('rates', 'ParameterSet of annual rates.')
+    ref_epoch  = _attribute('ref_epoch',
+                            'Epoch at which *parameters* are valid.')
 
 
     def __repr__(self):
-        return ('''%s(from_frame = %r, to_frame = %r,
-        parameters = %r,
-        rates      = %r,
-        ref_epoch  = %r)''' %
-                (type(self).__name__, self.from_frame, self.to_frame,
-                 self.parameters, self.rates, self.ref_epoch))
+        # Formatting the arrays is slow, so the result is kept until
+        # one of the attributes is assigned.
+        if self._repr is None:
+            self._repr = (f'{type(self).__name__}('
+                          f'from_frame = {self.from_frame!r}, '
+                          f'to_frame = {self.to_frame!r},\n'
+                          f'        parameters = {self.parameters!r},\n'
+                          f'        rates      = {self.rates!r},\n'
+                          f'        ref_epoch  = {self.ref_epoch!r})')
+        return self._repr
 
 
     def propagate_parameters(self, epoch):
@@ -278,7 +479,144 @@ class DatumTransformation(object):
         return self.parameters + self.rates*(epoch - self.ref_epoch)
 
 
-    def convert_fn(self, from_frame, to_frame, epoch):
+    def _is_forward(self, from_frame, to_frame):
+        r'''
+        Returns True if converting from *from_frame* to *to_frame* is
+        the forward transform, and False if it is the reverse
+        transform. Raises a ValueError if it is neither.
+        '''
+        forward = self._directions.get((from_frame, to_frame))
+        if forward is None:
+            raise ValueError('No transform %r -> %r only %r <-> %r.' %
+                             (from_frame, to_frame,
+                              self.to_frame, self.from_frame))
+        return forward
+
+
+    def affine(self, from_frame, to_frame, epoch):
+        r'''
+        Returns the conversion from ``from_frame`` to ``to_frame`` at
+        *epoch* as an affine map: a matrix *A* and an offset *b*, such
+        that the converted coordinates are :math:`b + A x`. For the
+        forward transform, :math:`A = I + M` and :math:`b = T`. For
+        the reverse transform, :math:`A = I - M` and :math:`b = -A T`.
+
+        **Parameters**
+
+        from_frame : string
+            Frame from which to transform, e.g. 'ITRF2008'.
+
+        to_frame : string
+            Frame to which to transform, e.g. 'ETRF2000'.
+
+        epoch : number
+            Epoch at which the coordinates were observed, or are
+            required, in years. Example: 2013.5.
+
+        **Raises**
+
+        ValueError
+            if *to_frame* or *from_frame* is not in *[self.to_frame,
+            self.from_frame]*.
+
+        **Returns**
+
+        A tuple *(full_matrix, offset_m)* of a numpy.array of shape
+        (3, 3) and one of length 3.
+        '''
+        full_matrix, offset_m = self._affine_for_epoch(
+            epoch, self._is_forward(from_frame, to_frame))
+        return full_matrix.copy(), offset_m.copy()
+
+
+    def affines(self, from_frame, to_frame, epochs):
+        r'''
+        The same as *affine()*, but for an array of epochs, which are
+        all propagated at once.
+
+        **Parameters**
+
+        from_frame : string
+            Frame from which to transform, e.g. 'ITRF2008'.
+
+        to_frame : string
+            Frame to which to transform, e.g. 'ETRF2000'.
+
+        epochs : numpy.array of shape S
+            Epochs at which the coordinates were observed, or are
+            required, in years.
+
+        **Raises**
+
+        ValueError
+            if *to_frame* or *from_frame* is not in *[self.to_frame,
+            self.from_frame]*.
+
+        **Returns**
+
+        A tuple *(full_matrices, offsets_m)* of numpy.arrays of shape
+        S + (3, 3) and S + (3,).
+
+        **Examples**
+
+        >>> from etrsitrs.main import find_transform
+        >>> transform = find_transform('ITRF2008', 'ETRF2000')
+        >>> full_matrices, offsets_m = transform.affines(
+        ...     'ETRF2000', 'ITRF2008', array([2000.0, 2005.0, 2010.0]))
+        >>> full_matrices.shape, offsets_m.shape
+        ((3, 3, 3), (3, 3))
+        >>> expected = transform.affine('ETRF2000', 'ITRF2008', 2005.0)
+        >>> abs(offsets_m[1] - expected[1]).max() < 1e-15
+        True
+        '''
+        forward = self._is_forward(from_frame, to_frame)
+        years   = asarray(epochs, dtype=float) - self.ref_epoch
+        vectors = (self._parameter_vector +
+                   self._rate_vector*years[..., newaxis])
+        if forward:
+            full_matrices = transform_matrices(1.0 + vectors[..., 3],
+                                               vectors[..., 4:7])
+            return full_matrices, vectors[..., 0:3]
+        full_matrices = transform_matrices(1.0 - vectors[..., 3],
+                                           -vectors[..., 4:7])
+        return full_matrices, -einsum('...ij,...j->...i', full_matrices,
+                                      vectors[..., 0:3])
+
+
+    def _affine_for_epoch(self, epoch, forward):
+        r'''
+        Returns the cached *(full_matrix, offset_m)* of *affine()* for
+        the forward transform if *forward* is True, and the reverse
+        transform otherwise. The caller must not modify the arrays.
+        Only this affine map is kept, not the propagated parameters
+        themselves. The cache holds at most 2*EPOCH_CACHE_SIZE
+        (epoch, direction) entries in total, and is emptied as a whole
+        when it is full.
+        '''
+        # A 0-d numpy.array is a valid epoch, but not hashable.
+        epoch = float(epoch)
+        key   = (epoch, forward)
+        try:
+            return self._affine_cache[key]
+        except KeyError:
+            pass
+        vector = (self._parameter_vector +
+                  self._rate_vector*(epoch - self.ref_epoch))
+        translate_m = vector[0:3]
+        term_d, r_1, r_2, r_3 = vector[3:7].tolist()
+        if forward:
+            full_matrix = transform_matrix(1.0 + term_d, (r_1, r_2, r_3))
+            offset_m    = translate_m
+        else:
+            full_matrix = transform_matrix(1.0 - term_d, (-r_1, -r_2, -r_3))
+            offset_m    = -matmul(full_matrix, translate_m)
+        if len(self._affine_cache) >= 2*EPOCH_CACHE_SIZE:
+            self._affine_cache.clear()
+        self._affine_cache[key] = full_matrix, offset_m
+        return full_matrix, offset_m
+
+
+    def convert_fn(self, from_frame, to_frame, epoch, backend='cpu'):
         r'''
         Returns a function *convert(xyz_m)* that converts an XYZ
         vector from ``from_frame`` to ``to_frame``. If ``from_frame``
@@ -296,45 +634,88 @@ class DatumTransformation(object):
         epoch : number
             Epoch at which the coordinates were observed, or are
             required, in years. Example: 2013.5. 
+
+        backend : string
+            Either 'cpu' (default) or 'cuda'. The 'cuda' backend
+            requires cupy, and only pays off for millions of
+            coordinates, because they have to be copied to and from
+            the GPU. Its conversion function returns a cupy array if
+            it is given one, so that data can stay on the GPU.
         
         **Raises**
 
         ValueError
             if *to_frame* or *from_frame* is not in *[self.to_frame,
-            self.from_frame]*. 
+            self.from_frame]*, or if *backend* is unknown.
+
+        ImportError
+            if *backend* is 'cuda' and cupy is not installed.
 
         **Returns**
 
-        A function *f(xyz_m)* that returns a *numpy.array* of length
-        3.
+        A function *f(xyz_m, out=None)* that returns a *numpy.array*
+        of the same shape as *xyz_m*, which is either (3,) or (N,
+        3). If the array *out* is given, the result is written to it
+        instead of to a new array. It may be *xyz_m* itself.
         '''
-        parameters = self.propagate_parameters(epoch)
-        translate_m = parameters.translate_m
-        matrix      = parameters.matrix()
-
-        if from_frame == self.from_frame and to_frame == self.to_frame:
-            transform = forward_transform
-        elif from_frame == self.to_frame and to_frame == self.from_frame:
-            transform = reverse_transform
-        else:
-            raise ValueError('No transform %r -> %r only %r <-> %r.' %
-                             (from_frame, to_frame,
-                              self.to_frame, self.from_frame))
-        def convert_function(xyz_m):
+        forward = self._is_forward(from_frame, to_frame)
+        full_matrix, offset_m = self._affine_for_epoch(epoch, forward)
+        if backend == 'cuda':
+            return _cuda_convert_fn(full_matrix, offset_m)
+        if backend != 'cpu':
+            raise ValueError("backend(%r) must be 'cpu' or 'cuda'." %
+                             (backend,))
+        # xyz_m @ full_matrix.T on (N, 3) arrays works best if both
+        # operands are C-contiguous, which a transposed view is not.
+        full_matrix_t = ascontiguousarray(full_matrix.T)
+
+        # Specialise the single coordinate case for this transform and
+        # epoch: both directions reduce to offset_m + full_matrix*xyz_m,
+        # with the twelve numbers bound as plain Python floats.
+        t_1, t_2, t_3 = offset_m.tolist()
+        ((a_11, a_12, a_13),
+         (a_21, a_22, a_23),
+         (a_31, a_32, a_33)) = full_matrix.tolist()
+
+        def convert_function(xyz_m, out=None):
             r'''
             Convert *xyz_m* to anorther datum.
             
             **Parameters**
             
-            xyz_m : numpy.array of floats of length 3
+            xyz_m : numpy.array of floats of shape (3,) or (N, 3)
                 The coordinates to transform.
+
+            out : numpy.array of floats of the same shape, optional
+                Array to which the result is written.
             
             **Returns**
 
-            A numpy.array of floats of length 3 containing the
-            transformed coordinates.
+            A numpy.array of floats of the same shape as *xyz_m*
+            containing the transformed coordinates. This is *out* if
+            it is given.
             '''
-            return transform(xyz_m, translate_m, matrix)
+            if ndim(xyz_m) == 1:
+                x_m, y_m, z_m = asarray(xyz_m, dtype=float).tolist()
+                result = [t_1 + a_11*x_m + a_12*y_m + a_13*z_m,
+                          t_2 + a_21*x_m + a_22*y_m + a_23*z_m,
+                          t_3 + a_31*x_m + a_32*y_m + a_33*z_m]
+                if out is None:
+                    return array(result)
+                out[:] = result
+                return out
+            # matmul() also handles (..., 3), and rejects bad shapes.
+            kernel = None
+            if _use_kernel(xyz_m, out):
+                kernel = compiled_apply_affine()
+            if kernel is None:
+                result = matmul(xyz_m, full_matrix_t, out=out)
+                result += offset_m
+                return result
+            xyz_m  = ascontiguousarray(xyz_m, dtype=float)
+            result = empty_like(xyz_m) if out is None else out
+            kernel(xyz_m, full_matrix, offset_m, result)
+            return result
         return convert_function
         
 
@@ -349,7 +730,7 @@ class DatumTransformation(object):
 
         **Parameters**
         
-        xyz_m : sequence of 3 floats
+        xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
             The coordinates to convert.
 
         from_frame : string
@@ -370,6 +751,200 @@ class DatumTransformation(object):
 
         **Returns**
         
-        A *numpy.array* of length 3.
+        A *numpy.array* of the same shape as *xyz_m*.
         '''
         return self.convert_fn(from_frame, to_frame, epoch)(xyz_m)
+
+
+    def convert_many(self, xyz_m, from_frame, to_frame, epoch):
+        r'''
+        Converts many coordinates from *from_frame* to *to_frame* in
+        one matrix multiplication. Unlike *convert()*, the coordinates
+        may be stored either one per row, as an (N, 3) array, or one
+        per column, as a (3, N) array. A (3, 3) array is taken to
+        contain one coordinate per row. For the best throughput with
+        large N, pass a C-contiguous (N, 3) array of float64: those
+        use the numba kernel of *convert_fn()* if numba is installed.
+
+        **Parameters**
+
+        xyz_m : numpy.array of shape (N, 3) or (3, N)
+            The coordinates to convert.
+
+        from_frame : string
+            Frame from which to transform, e.g. 'ITRF2008'.
+
+        to_frame : string
+            Frame to which to transform, e.g. 'ETRF2000'.
+
+        epoch : number
+            Epoch at which the coordinates were observed, or are
+            required, in years. Example: 2013.5.
+
+        **Raises**
+
+        ValueError
+            if *to_frame* or *from_frame* is not in *[self.to_frame,
+            self.from_frame]*, or if *xyz_m* has neither 3 rows nor 3
+            columns.
+
+        **Returns**
+
+        A *numpy.array* of the same shape as *xyz_m*.
+
+        **Examples**
+
+        >>> from etrsitrs.main import find_transform
+        >>> transform = find_transform('ITRF2008', 'ETRF2000')
+        >>> columns = array([[3370658.542, 3370658.542],
+        ...                  [ 711877.138,  711877.138],
+        ...                  [5349786.952, 5349786.952]])
+        >>> transform.convert_many(columns, 'ITRF2008', 'ETRF2000', 2005.0)[:, 0]
+        array([ 3370658.84754169,   711876.94834657,  5349786.7701648 ])
+        >>> transform.convert_many(columns[0:2], 'ITRF2008', 'ETRF2000', 2005.0)
+        Traceback (most recent call last):
+        ...
+        ValueError: xyz_m must have shape (N, 3) or (3, N), not (2, 2).
+        '''
+        xyz_m = asarray(xyz_m, dtype=float)
+        if ndim(xyz_m) == 2 and xyz_m.shape[1] == 3:
+            # Rows go through the conversion function, which streams
+            # large arrays through the fused numba kernel if available.
+            return self.convert_fn(from_frame, to_frame, epoch)(xyz_m)
+        full_matrix, offset_m = self._affine_for_epoch(
+            epoch, self._is_forward(from_frame, to_frame))
+        if ndim(xyz_m) == 2 and xyz_m.shape[0] == 3:
+            result = matmul(full_matrix, xyz_m)
+            result += offset_m[:, newaxis]
+        else:
+            raise ValueError('xyz_m must have shape (N, 3) or (3, N), not %r.'
+                             % (xyz_m.shape,))
+        return result
+
+
+
+    def convert_multi_epoch(self, xyz_m, from_frame, to_frame, epochs):
+        r'''
+        Converts the same coordinates from *from_frame* to *to_frame*
+        at each of E epochs, for example to follow a station over a
+        multi-year observation window. The parameters are propagated
+        to all epochs at once, and all E affine maps are applied in a
+        single product.
+
+        **Parameters**
+
+        xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
+            The coordinates to convert.
+
+        from_frame : string
+            Frame from which to transform, e.g. 'ITRF2008'.
+
+        to_frame : string
+            Frame to which to transform, e.g. 'ETRF2000'.
+
+        epochs : sequence of E numbers
+            Epochs at which the coordinates were observed, or are
+            required, in years.
+
+        **Raises**
+
+        ValueError
+            if *to_frame* or *from_frame* is not in *[self.to_frame,
+            self.from_frame]*.
+
+        **Returns**
+
+        A *numpy.array* of shape (E, 3) or (E, N, 3).
+
+        **Examples**
+
+        >>> from etrsitrs.main import find_transform
+        >>> transform = find_transform('ITRF2008', 'ETRF2000')
+        >>> onsala_itrf2008 = array([3370658.542, 711877.138, 5349786.952])
+        >>> for xyz in transform.convert_multi_epoch(
+        ...         onsala_itrf2008, 'ITRF2008', 'ETRF2000', [2000.0, 2005.0]):
+        ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+        3370658.768, 711877.023, 5349786.816
+        3370658.848, 711876.948, 5349786.770
+        '''
+        full_matrices, offsets_m = self.affines(from_frame, to_frame,
+                                                ravel(epochs))
+        xyz_m = asarray(xyz_m, dtype=float)
+        if ndim(xyz_m) == 1:
+            result  = matmul(full_matrices, xyz_m)
+            result += offsets_m
+        else:
+            result  = einsum('eij,nj->eni', full_matrices, xyz_m,
+                             optimize=True)
+            result += offsets_m[:, newaxis, :]
+        return result
+
+
+
+    def convert_at_epochs(self, xyz_m, from_frame, to_frame, epochs):
+        r'''
+        Converts coordinates that each have their own epoch, for
+        example a time series of GNSS positions. The parameters are
+        propagated to all epochs, and applied to the coordinates, in a
+        few array operations. For at least *NUMBA_MIN_POINTS*
+        coordinates of shape (N, 3), numba's *propagate_and_apply()*
+        does both in a single pass without the (N, 3, 3) matrices, if
+        numba is available.
+
+        **Parameters**
+
+        xyz_m : numpy.array of shape (..., 3)
+            The coordinates to convert.
+
+        from_frame : string
+            Frame from which to transform, e.g. 'ITRF2008'.
+
+        to_frame : string
+            Frame to which to transform, e.g. 'ETRF2000'.
+
+        epochs : number or numpy.array
+            Epochs in years, broadcast against the leading axes
+            *xyz_m.shape[:-1]*.
+
+        **Raises**
+
+        ValueError
+            if *to_frame* or *from_frame* is not in *[self.to_frame,
+            self.from_frame]*.
+
+        **Returns**
+
+        A *numpy.array* of the broadcast shape of *xyz_m* and *epochs*
+        with an extra last axis of length 3.
+
+        **Examples**
+
+        >>> from etrsitrs.main import find_transform
+        >>> transform = find_transform('ITRF2008', 'ETRF2000')
+        >>> onsala_itrf2008 = array([3370658.542, 711877.138, 5349786.952])
+        >>> for xyz in transform.convert_at_epochs(
+        ...         array([onsala_itrf2008, onsala_itrf2008]),
+        ...         'ITRF2008', 'ETRF2000', array([2000.0, 2005.0])):
+        ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+        3370658.768, 711877.023, 5349786.816
+        3370658.848, 711876.948, 5349786.770
+        '''
+        xyz_m = asarray(xyz_m, dtype=float)
+        epochs = asarray(epochs, dtype=float)
+        # The kernel takes one epoch per coordinate; other shapes of
+        # epochs broadcast to more conversions than coordinates.
+        kernel = None
+        if _use_kernel(xyz_m) and epochs.shape in ((), xyz_m.shape[:1]):
+            kernel = compiled_propagate_and_apply()
+        if kernel is not None:
+            forward = self._is_forward(from_frame, to_frame)
+            epochs  = ascontiguousarray(broadcast_to(epochs, xyz_m.shape[:1]))
+            result  = empty_like(xyz_m)
+            kernel(
+                xyz_m, epochs, self._parameter_vector, self._rate_vector,
+                float(self.ref_epoch), forward, result)
+            return result
+        full_matrices, offsets_m = self.affines(from_frame, to_frame, epochs)
+        result  = einsum('...ij,...j->...i', full_matrices, xyz_m)
+        result += offsets_m
+        return result
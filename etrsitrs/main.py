@@ -2,26 +2,43 @@ r'''
 This module is home to the most important functions: *convert()* and
 *convert_fn()*. Use *convert()* if you are only interested in one or
 two coordinate conversions, but create a conversion function with the
-help of *convert_fn()* if you want to convert more coordinates.
+help of *convert_fn()* if you want to convert more coordinates. Use
+*convert_all_frames()* to convert coordinates to all frames at once.
 
 This module contains a hardcoded table of predefined
 DatumTransformations, called *TRANSFORM_TABLE*. The function
-*find_transform()* searches this table.
+*find_transform()* searches this table. *build_affine_batch()* and
+*convert_batch()* apply many transforms to the same coordinates. The
+coefficients of the transforms in the table are also stacked in
+(K, 7) arrays, which *propagate()* propagates to an epoch for many
+transforms at once. *convert_many_frames()* uses them to convert
+coordinates that are each in their own ITRF realisation. These arrays
+are rebuilt whenever *TRANSFORM_TABLE*, or one of its transforms,
+changes.
 
 '''
 
+from collections import namedtuple
+
 import numpy
 try:
     from etrsitrs.datumtransformation import DatumTransformation
-    from etrsitrs.parameterset import ParameterSet
+    from etrsitrs.parameterset import ParameterSet, transform_matrices
 except ImportError:
     from datumtransformation import DatumTransformation
-    from parameterset import ParameterSet
+    from parameterset import ParameterSet, transform_matrices
     
 
+# Conversion factors from the units of the EUREF memo to SI units.
+_MM_TO_M    = 0.001
+_MAS_TO_RAD = numpy.pi / (180.0 * 3600.0 * 1000.0)
+# Per element of [T1, T2, T3, D, R1, R2, R3].
+_MEMO_UNITS = numpy.array([_MM_TO_M, _MM_TO_M, _MM_TO_M, 1e-9,
+                           _MAS_TO_RAD, _MAS_TO_RAD, _MAS_TO_RAD])
+
 
 
-def convert_fn(from_frame, to_frame, epoch):
+def convert_fn(from_frame, to_frame, epoch, backend='cpu'):
     r'''
     Returns a function *convert_function(xyz_m)* that converts an XYZ
     vector from ``from_frame`` to ``to_frame`` at the given ``epoch``.
@@ -37,15 +54,23 @@ def convert_fn(from_frame, to_frame, epoch):
     epoch : number
         Epoch at which the coordinates were observed, or are
         required, in years. Example: 2013.5. 
+
+    backend : string
+        Either 'cpu' (default) or 'cuda', see
+        *DatumTransformation.convert_fn()*.
         
     **Raises**
 
     KeyError
         If no appropriate transform is found
 
+    ValueError
+        If *backend* is unknown.
+
     **Returns**
 
-    A function *f(xyz_m)* that returns a *numpy.array* of length 3.
+    A function *f(xyz_m)* that returns a *numpy.array* of the same
+    shape as *xyz_m*, which is either (3,) or (N, 3).
 
     **Examples**
     
@@ -56,7 +81,7 @@ def convert_fn(from_frame, to_frame, epoch):
 
     '''
     transform = find_transform(from_frame, to_frame)
-    return transform.convert_fn(from_frame, to_frame, epoch)
+    return transform.convert_fn(from_frame, to_frame, epoch, backend)
 
 
 def convert(xyz_m, from_frame, to_frame, epoch):
@@ -68,7 +93,7 @@ def convert(xyz_m, from_frame, to_frame, epoch):
 
     **Parameters**
         
-    xyz_m : sequence of 3 floats
+    xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
         The coordinates to convert.
 
     from_frame : string
@@ -88,7 +113,7 @@ def convert(xyz_m, from_frame, to_frame, epoch):
 
     **Returns**
         
-    A *numpy.array* of length 3.
+    A *numpy.array* of the same shape as *xyz_m*.
 
     **Examples**
     
@@ -101,6 +126,241 @@ def convert(xyz_m, from_frame, to_frame, epoch):
     return transform.convert(xyz_m, from_frame, to_frame, epoch)
 
 
+def convert_all_frames(xyz_m, from_frame, epoch):
+    r'''
+    Converts *xyz_m* from *from_frame* to every frame in
+    *TRANSFORM_TABLE* that it can be converted to. For 'ETRF2000',
+    these are all ITRF realisations in the table. The affine maps of
+    the K conversions are computed at once by *propagate()*, and
+    applied in a single matrix multiplication.
+
+    **Parameters**
+
+    xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
+        The coordinates to convert.
+
+    from_frame : string
+        Frame from which to transform, e.g. 'ETRF2000'.
+
+    epoch : number
+        Epoch at which the coordinates were observed, or are
+        required, in years. Example: 2013.5.
+
+    **Raises**
+
+    KeyError
+        If no appropriate transform is found.
+
+    **Returns**
+
+    A tuple *(to_frames, xyz_converted_m)* with a list of the K frame
+    names, and a numpy.array of shape (K, 3) or (K, N, 3) with the
+    coordinates in each of these frames.
+
+    **Examples**
+
+    >>> onsala_etrf2000 = numpy.array([3370658.848, 711876.948, 5349786.770])
+    >>> to_frames, onsala = convert_all_frames(onsala_etrf2000, 'ETRF2000', 2005.0)
+    >>> for frame, xyz in list(zip(to_frames, onsala))[:3]:
+    ...     print('%-8s %.3f, %.3f, %.3f' % ((frame,) + tuple(xyz)))
+    ITRF2014 3370658.541, 711877.136, 5349786.950
+    ITRF2008 3370658.542, 711877.138, 5349786.952
+    ITRF2005 3370658.545, 711877.137, 5349786.952
+    >>> convert_all_frames(onsala_etrf2000, 'ITRF1833', 2005.0)
+    Traceback (most recent call last):
+    ...
+    KeyError: "No 'ITRF1833' -> * in etrsitrs.main.TRANSFORM_TABLE."
+    '''
+    table = _table()
+    try:
+        rows, forward, to_frames = table.connections[from_frame]
+    except KeyError:
+        raise KeyError('No %r -> * in etrsitrs.main.TRANSFORM_TABLE.' %
+                       (from_frame,)) from None
+    full_matrices, offsets_m = _propagate(table, rows, epoch, forward)
+    return list(to_frames), _apply_affines(xyz_m, full_matrices, offsets_m)
+
+
+
+def build_affine_batch(transforms, epoch):
+    r'''
+    Stacks the affine maps of the forward conversions of *transforms*
+    at *epoch* into one array, for use with *convert_batch()*.
+
+    **Parameters**
+
+    transforms : sequence of K DatumTransformation instances
+        The transforms, each of which is taken in the direction from
+        its *from_frame* to its *to_frame*.
+
+    epoch : number
+        Epoch at which the coordinates were observed, or are
+        required, in years. Example: 2013.5.
+
+    **Returns**
+
+    A numpy.array of shape (K, 3, 4). Element [k, :, 0:3] is the
+    matrix of transform k, and element [k, :, 3] its offset.
+
+    **Examples**
+
+    >>> affine_batch = build_affine_batch(TRANSFORM_TABLE[0:2], 2005.0)
+    >>> affine_batch.shape
+    (2, 3, 4)
+    '''
+    affine_batch = numpy.empty((len(transforms), 3, 4))
+    for affine, transform in zip(affine_batch, transforms):
+        full_matrix, offset_m = transform.affine(transform.from_frame,
+                                                 transform.to_frame, epoch)
+        affine[:, 0:3] = full_matrix
+        affine[:, 3]   = offset_m
+    return affine_batch
+
+
+
+def convert_batch(xyz_m, affine_batch):
+    r'''
+    Applies each of the K affine maps in *affine_batch* to all of
+    *xyz_m*.
+
+    **Parameters**
+
+    xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
+        The coordinates to convert.
+
+    affine_batch : numpy.array of shape (K, 3, 4)
+        The affine maps, for example from *build_affine_batch()*.
+
+    **Returns**
+
+    A numpy.array of shape (K, 3) or (K, N, 3).
+
+    **Examples**
+
+    >>> affine_batch = build_affine_batch(TRANSFORM_TABLE[0:2], 2005.0)
+    >>> onsala_itrf = numpy.array([3370658.542, 711877.138, 5349786.952])
+    >>> for xyz in convert_batch(onsala_itrf, affine_batch):
+    ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+    3370658.849, 711876.950, 5349786.772
+    3370658.848, 711876.948, 5349786.770
+    '''
+    return _apply_affines(xyz_m, affine_batch[:, :, 0:3],
+                          affine_batch[:, :, 3])
+
+
+
+def _apply_affines(xyz_m, full_matrices, offsets_m):
+    r'''
+    Returns *offsets_m[k] + full_matrices[k] xyz_m* for each k, in an
+    array of shape (K, 3) or (K, N, 3).
+    '''
+    xyz_m = numpy.asarray(xyz_m, dtype=float)
+    if xyz_m.ndim == 1:
+        result  = numpy.matmul(full_matrices, xyz_m)
+        result += offsets_m
+        return result
+    # With optimize=True, einsum evaluates all K maps in a single
+    # (3K, 3) x (3, N) product, which is considerably faster than a
+    # stacked matmul for large N.
+    result  = numpy.einsum('kij,nj->kni', full_matrices, xyz_m,
+                           optimize=True)
+    result += offsets_m[:, numpy.newaxis, :]
+    return result
+
+
+
+def convert_many_frames(xyz_m, itrf_frames, epochs, to_etrf2000=True):
+    r'''
+    Converts N coordinates that may each be in a different ITRF
+    realisation, and at a different epoch, to ETRF2000, or v.v. Each
+    frame is looked up in *TRANSFORM_TABLE* like *find_transform()*
+    does, after which the parameters of all coordinates are
+    propagated at once, and the N affine maps are applied in a single
+    pass.
+
+    **Parameters**
+
+    xyz_m : numpy.array of shape (N, 3)
+        The coordinates to convert.
+
+    itrf_frames : sequence of N strings or ints
+        The ITRF realisation of each coordinate, e.g. 'ITRF2008', or
+        its row in *TRANSFORM_TABLE*.
+
+    epochs : number or sequence of N numbers
+        Epoch of each coordinate, in years.
+
+    to_etrf2000 : bool
+        If True (default), convert from the ITRF realisations to
+        ETRF2000. Otherwise convert from ETRF2000 to the ITRF
+        realisations.
+
+    **Raises**
+
+    KeyError
+        If a frame is not in *TRANSFORM_TABLE*.
+
+    **Returns**
+
+    A numpy.array of shape (N, 3).
+
+    **Examples**
+
+    >>> onsala = numpy.array([[3370658.542, 711877.138, 5349786.952],
+    ...                       [3370658.545, 711877.137, 5349786.952]])
+    >>> for xyz in convert_many_frames(onsala, ['ITRF2008', 'ITRF2005'],
+    ...                                [2005.0, 2005.0]):
+    ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+    3370658.848, 711876.948, 5349786.770
+    3370658.848, 711876.948, 5349786.770
+    >>> convert_many_frames(onsala, ['ITRF2008', 'ITRF1833'], 2005.0)
+    Traceback (most recent call last):
+    ...
+    KeyError: "No 'ITRF1833' -> * in etrsitrs.main.TRANSFORM_TABLE."
+    '''
+    table   = _table()
+    index   = numpy.asarray(itrf_frames)
+    forward = to_etrf2000
+    if index.dtype.kind in 'USO':
+        # Look up each distinct frame name only once.
+        names, inverse = numpy.unique(index, return_inverse=True)
+        rows, directions = [], []
+        for name in names.tolist():
+            from_frame, to_frame = name, 'ETRF2000'
+            if not to_etrf2000:
+                from_frame, to_frame = to_frame, from_frame
+            try:
+                row = table.transform_index[(from_frame, to_frame)]
+            except KeyError:
+                raise KeyError('No %r -> * in etrsitrs.main.TRANSFORM_TABLE.'
+                               % (name,)) from None
+            rows.append(row)
+            directions.append(table.transforms[row].from_frame == from_frame)
+        inverse = inverse.reshape(index.shape)
+        index   = numpy.array(rows)[inverse]
+        forward = numpy.array(directions)[inverse]
+    full_matrices, offsets_m = _propagate(table, index, numpy.asarray(epochs),
+                                          forward)
+    result  = numpy.einsum('nij,nj->ni', full_matrices,
+                           numpy.asarray(xyz_m, dtype=float))
+    result += offsets_m
+    return result
+
+
+def _memo_to_si(values):
+    r'''
+    Converts the seven *values* [T1 (mm), T2 (mm), T3 (mm), D (1e-9),
+    R1 (mas), R2 (mas), R3 (mas)] to meters and radians in one
+    multiplication. Raises a ValueError if *values* does not have
+    seven elements.
+    '''
+    if len(values) != 7:
+        raise ValueError('%r must be a sequence of 7 floats '
+                         '[T1, T2, T3, D, R1, R2, R3].' % (values,))
+    return numpy.asarray(values, dtype=float)*_MEMO_UNITS
+
+
+
 class ETRF2000(DatumTransformation):
     r'''
     ETRF2000 is a subclass of *DatumTransformation* that makes it
@@ -142,19 +402,23 @@ class ETRF2000(DatumTransformation):
             parameters = ParameterSet(translate_m = array([ 0.0521,  0.0493, -0.0585]), term_d = 1.3400e-09, rotate_rad = array([  4.31968990e-09,   2.61314574e-08,  -4.22369679e-08])),
             rates      = ParameterSet(translate_m = array([ 0.0001,  0.0001, -0.0018]), term_d = 8.0000e-11, rotate_rad = array([  3.92699082e-10,   2.37558704e-09,  -3.83972435e-09])),
             ref_epoch  = 2000.0)
+    >>> ETRF2000('ITRF2008', [52.1, 49.3, -58.5], [0.0]*7, 2000.0)
+    Traceback (most recent call last):
+    ...
+    ValueError: [52.1, 49.3, -58.5] must be a sequence of 7 floats [T1, T2, T3, D, R1, R2, R3].
    
     '''
+    __slots__ = ()
+
     def __init__(self, from_frame, parameters, rates, ref_epoch):
-        mm  = 0.001
-        mas = numpy.pi / (180.0 * 3600.0 * 1000.0)
+        parameters_si = _memo_to_si(parameters)
+        rates_si      = _memo_to_si(rates)
         super(ETRF2000, self).__init__(
             from_frame = from_frame, to_frame = 'ETRF2000',
-            parameters = ParameterSet(numpy.array(parameters[0:3])*mm,
-                                      parameters[3]*1e-9, 
-                                      numpy.array(parameters[4:])*mas),
-            rates      = ParameterSet(numpy.array(rates[0:3])*mm,
-                                      rates[3]*1e-9, 
-                                      numpy.array(rates[4:])*mas),
+            parameters = ParameterSet(parameters_si[0:3], parameters_si[3],
+                                      parameters_si[4:7]),
+            rates      = ParameterSet(rates_si[0:3], rates_si[3],
+                                      rates_si[4:7]),
             ref_epoch  = ref_epoch)
         
 
@@ -169,57 +433,206 @@ class ETRF2000(DatumTransformation):
 # "EUREF Technical Note 1: Relationship and Transformation between
 # the International and the European Terrestrial Reference Systems"
 # http://etrs89.ensg.ign.fr/pub/EUREF-TN-1.pdf
+#
+# The coefficients are stored column-wise: the frames from which each
+# transform converts, the (K, 7) arrays of parameters and rates, and
+# the reference epochs. TRANSFORM_TABLE is built from these arrays.
+_FROM_FRAMES = ['ITRF2014', 'ITRF2008', 'ITRF2005', 'ITRF2000',
+                'ITRF97', 'ITRF96', 'ITRF94', 'ITRF93',
+                'ITRF92', 'ITRF91', 'ITRF90', 'ITRF89']
+
 #                          |'T1' |'T2' |'T3'  |'D'   |'R1'  |'R2'  |'R3'   |
 #                          |(mm) |(mm) |(mm)  |x 1e-9|(mas) |(mas) |(mas)  |
-TRANSFORM_TABLE = [
-                   ETRF2000('ITRF2014',
-                            [54.7, 52.2, -74.1,  2.12, 1.701,10.290,-16.632],
-                            [ 0.1,  0.1,  -1.9,  0.11, 0.081, 0.490, -0.792],
-                            2010.0),
-                   ETRF2000('ITRF2008' ,
-                            [52.1, 49.3, -58.5,  1.34, 0.891, 5.390, -8.712],
-                            [ 0.1,  0.1,  -1.8,  0.08, 0.081, 0.490, -0.792],
-                            2000.0),
-                   ETRF2000('ITRF2005' ,
-                            [54.1, 50.2, -53.8,  0.40, 0.891, 5.390, -8.712],
-                            [-0.2,  0.1,  -1.8,  0.08, 0.081, 0.490, -0.792],
-                            2000.0),
-                   ETRF2000('ITRF2000' ,
-                            [54.0, 51.0, -48.0,  0.00, 0.891, 5.390, -8.712],
-                            [ 0.0,  0.0,   0.0,  0.00, 0.081, 0.490, -0.792],
-                            2000.0),
-                   ETRF2000('ITRF97',
-                            [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF96',
-                            [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF94',
-                            [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF93',
-                            [76.1, 46.9, -19.9, -2.07, 2.601, 6.870, -8.412],
-                            [ 2.9,  0.2,   0.6, -0.01, 0.191, 0.680, -0.862],
-                            2000.0),
-                   ETRF2000('ITRF92',
-                            [39.3, 44.7, -17.3, -0.87, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF91',
-                            [27.3, 30.7, -11.3, -2.27, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF90',
-                            [29.3, 34.7,   4.7, -2.57, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0),
-                   ETRF2000('ITRF89',
-                            [24.3, 10.7,  42.7, -5.97, 0.891, 5.390, -8.772],
-                            [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
-                            2000.0)]
+_PARAMETERS = numpy.array([[54.7, 52.2, -74.1,  2.12, 1.701,10.290,-16.632],
+                           [52.1, 49.3, -58.5,  1.34, 0.891, 5.390, -8.712],
+                           [54.1, 50.2, -53.8,  0.40, 0.891, 5.390, -8.712],
+                           [54.0, 51.0, -48.0,  0.00, 0.891, 5.390, -8.712],
+                           [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
+                           [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
+                           [47.3, 46.7, -25.3, -1.58, 0.891, 5.390, -8.772],
+                           [76.1, 46.9, -19.9, -2.07, 2.601, 6.870, -8.412],
+                           [39.3, 44.7, -17.3, -0.87, 0.891, 5.390, -8.772],
+                           [27.3, 30.7, -11.3, -2.27, 0.891, 5.390, -8.772],
+                           [29.3, 34.7,   4.7, -2.57, 0.891, 5.390, -8.772],
+                           [24.3, 10.7,  42.7, -5.97, 0.891, 5.390, -8.772]])
+
+#                          |'T1' |'T2' |'T3'  |'D'   |'R1'  |'R2'  |'R3'   |
+#                          |(mm) |(mm) |(mm)  |x 1e-9|(mas) |(mas) |(mas)  |
+_RATES      = numpy.array([[ 0.1,  0.1,  -1.9,  0.11, 0.081, 0.490, -0.792],
+                           [ 0.1,  0.1,  -1.8,  0.08, 0.081, 0.490, -0.792],
+                           [-0.2,  0.1,  -1.8,  0.08, 0.081, 0.490, -0.792],
+                           [ 0.0,  0.0,   0.0,  0.00, 0.081, 0.490, -0.792],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 2.9,  0.2,   0.6, -0.01, 0.191, 0.680, -0.862],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812],
+                           [ 0.0,  0.6,   1.4, -0.01, 0.081, 0.490, -0.812]])
+
+_REF_EPOCHS = numpy.array([2010.0, 2000.0, 2000.0, 2000.0,
+                           2000.0, 2000.0, 2000.0, 2000.0,
+                           2000.0, 2000.0, 2000.0, 2000.0])
+
+TRANSFORM_TABLE = [ETRF2000(from_frame, parameters, rates, ref_epoch)
+                   for from_frame, parameters, rates, ref_epoch
+                   in zip(_FROM_FRAMES, _PARAMETERS, _RATES,
+                          _REF_EPOCHS.tolist())]
+
+
+
+
+def _index_transforms(transforms):
+    r'''
+    **Returns**
+
+    A dict that maps both (from_frame, to_frame) and (to_frame,
+    from_frame) onto the row of the first transform in *transforms*
+    that connects them.
+    '''
+    index = {}
+    for row, transform in enumerate(transforms):
+        index.setdefault((transform.from_frame, transform.to_frame), row)
+        index.setdefault((transform.to_frame, transform.from_frame), row)
+    return index
+
+
+
+
+def _connections(transforms):
+    r'''
+    **Returns**
+
+    A dict that maps each frame onto a tuple *(rows, forward,
+    to_frames)*: the rows in *transforms* that connect the frame to
+    another one, whether that is the forward transform of the row,
+    and the frames they convert to, all in the order of *transforms*.
+    '''
+    connections = {}
+    for row, transform in enumerate(transforms):
+        for frame, to_frame, forward in (
+                (transform.from_frame, transform.to_frame, True),
+                (transform.to_frame, transform.from_frame, False)):
+            rows, directions, to_frames = connections.setdefault(
+                frame, ([], [], []))
+            rows.append(row)
+            directions.append(forward)
+            to_frames.append(to_frame)
+    return {frame: (numpy.array(rows), numpy.array(directions), to_frames)
+            for frame, (rows, directions, to_frames) in connections.items()}
+
+
+# Everything derived from TRANSFORM_TABLE: a copy of its K
+# transforms, the index of _index_transforms(), the rows of
+# _connections(), and the (K, 7) parameter and rate vectors in meters
+# and radians with the K reference epochs, for propagate().
+_Table = namedtuple('_Table', ['transforms', 'transform_index',
+                               'connections', 'parameter_vectors',
+                               'rate_vectors', 'ref_epochs'])
+
+# _Table for TRANSFORM_TABLE, and the versions of its transforms when
+# it was built.
+_TABLE          = None
+_TABLE_VERSIONS = None
+
+
+
+def _table():
+    r'''
+    Returns the *_Table* for TRANSFORM_TABLE, rebuilding it if
+    transforms were added, removed, replaced, or modified since it was
+    last built.
+    '''
+    global _TABLE, _TABLE_VERSIONS
+    versions = [transform._version for transform in TRANSFORM_TABLE]
+    if versions != _TABLE_VERSIONS:
+        transforms = list(TRANSFORM_TABLE)
+        _TABLE = _Table(
+            transforms        = transforms,
+            transform_index   = _index_transforms(transforms),
+            connections       = _connections(transforms),
+            parameter_vectors = numpy.array(
+                [transform._parameter_vector for transform in transforms],
+                dtype=float).reshape(-1, 7),
+            rate_vectors      = numpy.array(
+                [transform._rate_vector for transform in transforms],
+                dtype=float).reshape(-1, 7),
+            ref_epochs        = numpy.array(
+                [transform.ref_epoch for transform in transforms],
+                dtype=float))
+        _TABLE_VERSIONS = versions
+    return _TABLE
+
+
+
+def propagate(index, epoch, forward=True):
+    r'''
+    Propagates the transforms in row(s) *index* of *TRANSFORM_TABLE*
+    to *epoch* and returns their affine maps, computed at once from
+    the stacked coefficient arrays of the table. The result is the
+    same as that of *DatumTransformation.affine()*.
+
+    **Parameters**
+
+    index : int or sequence of K ints
+        Row(s) of *TRANSFORM_TABLE*.
+
+    epoch : number
+        Epoch at which the coordinates were observed, or are
+        required, in years. Example: 2013.5.
+
+    forward : bool, or sequence of K bools
+        If True (default), convert from the *from_frame* of the
+        transforms to their *to_frame*, that is from the ITRF
+        realisations to ETRF2000, otherwise v.v. A sequence gives the
+        direction per row.
+
+    **Returns**
+
+    A tuple *(full_matrix, offset_m)* of numpy.arrays of shape (3, 3)
+    and (3,) for a single *index*, or (K, 3, 3) and (K, 3) for K of
+    them.
+
+    **Examples**
+
+    >>> full_matrix, offset_m = propagate(1, 2005.0)
+    >>> transform = find_transform('ITRF2008', 'ETRF2000')
+    >>> expected = transform.affine('ITRF2008', 'ETRF2000', 2005.0)
+    >>> (full_matrix == expected[0]).all(), (offset_m == expected[1]).all()
+    (True, True)
+    >>> full_matrices, offsets_m = propagate([0, 1, 2], 2005.0, forward=False)
+    >>> full_matrices.shape, offsets_m.shape
+    ((3, 3, 3), (3, 3))
+    '''
+    return _propagate(_table(), index, epoch, forward)
+
+
+
+def _propagate(table, index, epoch, forward):
+    r'''
+    *propagate()* for the rows of *_Table* *table*.
+    '''
+    index   = numpy.asarray(index)
+    years   = numpy.asarray(epoch - table.ref_epochs[index])
+    vectors = (table.parameter_vectors[index] +
+               table.rate_vectors[index]*years[..., numpy.newaxis])
+    translate_m = vectors[..., 0:3]
+    if numpy.ndim(forward) == 0:
+        sign = 1.0 if forward else -1.0
+        full_matrix = transform_matrices(1.0 + sign*vectors[..., 3],
+                                         sign*vectors[..., 4:7])
+        if forward:
+            return full_matrix, translate_m
+        offset_m = -numpy.matmul(full_matrix, translate_m[..., numpy.newaxis])
+        return full_matrix, offset_m[..., 0]
+    # One direction per row.
+    forward = numpy.asarray(forward, dtype=bool)[..., numpy.newaxis]
+    sign    = numpy.where(forward, 1.0, -1.0)
+    full_matrix = transform_matrices(1.0 + sign[..., 0]*vectors[..., 3],
+                                     sign*vectors[..., 4:7])
+    offset_m = -numpy.matmul(full_matrix, translate_m[..., numpy.newaxis])
+    return full_matrix, numpy.where(forward, translate_m, offset_m[..., 0])
 
 
 
@@ -229,7 +642,8 @@ TRANSFORM_TABLE = [
 
 def find_transform(from_frame, to_frame):
     r'''
-    Finds the appropriate *DatumTransformation* in *TRANSFORM_TABLE*.
+    Finds the first appropriate *DatumTransformation* in
+    *TRANSFORM_TABLE*, as it is at the time of the call.
     
     **Parameters**
 
@@ -267,15 +681,10 @@ def find_transform(from_frame, to_frame):
     KeyError: "No 'ITRF1833' -> 'ETRF2000' in etrsitrs.main.TRANSFORM_TABLE."
 
     '''
-    table  = TRANSFORM_TABLE
-    frames = [to_frame, from_frame]
-    
-    result = [transform for transform in table
-              if transform.to_frame in frames
-              and transform.from_frame in frames]
-    
-    if len(result) == 0:
+    table = _table()
+    try:
+        return table.transforms[table.transform_index[(from_frame,
+                                                       to_frame)]]
+    except KeyError:
         raise KeyError('No %r -> %r in etrsitrs.main.TRANSFORM_TABLE.' %
-                       (from_frame, to_frame))
-    else:
-        return result[0]
+                       (from_frame, to_frame)) from None
@@ -1,4 +1,87 @@
-from numpy import array
+from struct import Struct, error as StructError
+
+from numpy import (array, asarray, broadcast, einsum, empty, frombuffer,
+                   matmul, moveaxis, ndim, shape)
+
+# Smallest number of parameter sets for which ParameterSetArray.apply()
+# writes out the matrix products element by element. For fewer sets,
+# einsum() over the stacked matrices has less overhead.
+UNROLLED_MIN_SETS = 200
+
+_pack_vector = Struct('7d').pack
+
+
+def transform_matrix(term_d, rotate_rad):
+    r'''
+    **Returns**
+
+    The matrix
+
+    .. math::
+
+       \left(\begin{array}{ccc}
+       D  & -R3 &  R2 \\
+       R3 &  D  & -R1 \\ 
+       -R2 &  R1 &  D
+       \end{array}\right)
+
+    for term D *term_d* and rotations *rotate_rad* (R1, R2, R3).
+
+    **Examples**
+
+    >>> transform_matrix(3.14e-9, [-0.1, -0.2, -0.3])
+    array([[  3.14000000e-09,   3.00000000e-01,  -2.00000000e-01],
+           [ -3.00000000e-01,   3.14000000e-09,   1.00000000e-01],
+           [  2.00000000e-01,  -1.00000000e-01,   3.14000000e-09]])
+    '''
+    r_1, r_2, r_3 = rotate_rad
+    # Filling an empty array is considerably cheaper than having
+    # array() convert a nested list.
+    matrix = empty((3, 3))
+    matrix[0, 0] = matrix[1, 1] = matrix[2, 2] = term_d
+    matrix[0, 1], matrix[0, 2] = -r_3,  r_2
+    matrix[1, 0], matrix[1, 2] =  r_3, -r_1
+    matrix[2, 0], matrix[2, 1] = -r_2,  r_1
+    return matrix
+
+
+
+def transform_matrices(term_d, rotate_rad):
+    r'''
+    The same as *transform_matrix()*, but for arrays of parameters.
+
+    **Parameters**
+
+    term_d : numpy.array of shape S
+        Terms D.
+
+    rotate_rad : numpy.array of shape S + (3,)
+        Rotations (R1, R2, R3).
+
+    **Returns**
+
+    A numpy.array of shape S + (3, 3).
+
+    **Examples**
+
+    >>> transform_matrices(array([1.0, 2.0]), array([[-0.1, -0.2, -0.3],
+    ...                                             [ 0.1,  0.2,  0.3]]))
+    array([[[ 1. ,  0.3, -0.2],
+            [-0.3,  1. ,  0.1],
+            [ 0.2, -0.1,  1. ]],
+    <BLANKLINE>
+           [[ 2. , -0.3,  0.2],
+            [ 0.3,  2. , -0.1],
+            [-0.2,  0.1,  2. ]]])
+    '''
+    rotate_rad    = asarray(rotate_rad)
+    r_1, r_2, r_3 = rotate_rad[..., 0], rotate_rad[..., 1], rotate_rad[..., 2]
+    matrices = empty(shape(term_d) + (3, 3))
+    matrices[..., 0, 0] = matrices[..., 1, 1] = matrices[..., 2, 2] = term_d
+    matrices[..., 0, 1], matrices[..., 0, 2] = -r_3,  r_2
+    matrices[..., 1, 0], matrices[..., 1, 2] =  r_3, -r_1
+    matrices[..., 2, 0], matrices[..., 2, 1] = -r_2,  r_1
+    return matrices
 
 
 class ParameterSet(object):
@@ -65,11 +148,9 @@ class ParameterSet(object):
 
 
     '''
-    def __init__(self, translate_m, term_d, rotate_rad):
-        self.translate_m = array(translate_m)
-        self.term_d      = term_d
-        self.rotate_rad  = array(rotate_rad)
+    __slots__ = ('_vector', '_matrix', '_full_matrix')
 
+    def __init__(self, translate_m, term_d, rotate_rad):
         if len(translate_m) != 3:
             raise ValueError('translate_m(%r) must be e sequence of 3 floats.' %
                              (translate_m,))
@@ -79,11 +160,106 @@ class ParameterSet(object):
         if len(rotate_rad) != 3:
             raise ValueError('rotate_rad(%r) must be e sequence of 3 floats.' %
                              (rotate_rad,))
+        # All seven parameters are kept in one contiguous array, so
+        # that arithmetic on a ParameterSet is a single numpy operation.
+        # A ParameterSet is immutable, which lets it keep its matrices.
+        vector = None
+        if (isinstance(translate_m, (tuple, list)) and
+                isinstance(rotate_rad, (tuple, list))):
+            # Packing plain sequences of numbers into a (read-only)
+            # buffer takes less than half the time of filling an array.
+            try:
+                vector = frombuffer(_pack_vector(*translate_m, term_d,
+                                                 *rotate_rad))
+            except StructError:
+                pass
+        if vector is None:
+            vector = empty(7)
+            vector[0:3] = translate_m
+            vector[3]   = term_d
+            vector[4:7] = rotate_rad
+            vector.flags.writeable = False
+        self._vector = vector
+        self._matrix      = None
+        self._full_matrix = None
+
+
+    @classmethod
+    def _from_vector(cls, vector):
+        r'''
+        Create a ParameterSet from a numpy.array *vector* containing
+        (T1, T2, T3, D, R1, R2, R3), without copying or validating
+        it. For internal use on results of arithmetic with
+        ParameterSets, which are valid by construction. *vector* is
+        made read-only.
+        '''
+        parameter_set = object.__new__(cls)
+        vector.flags.writeable    = False
+        parameter_set._vector      = vector
+        parameter_set._matrix      = None
+        parameter_set._full_matrix = None
+        return parameter_set
+
+
+    @property
+    def translate_m(self):
+        r'''
+        The translation parameters (T1, T2, T3) in meters.
+        '''
+        return self._vector[0:3]
+
+
+    @property
+    def term_d(self):
+        r'''
+        Term D.
+        '''
+        return float(self._vector[3])
+
+
+    @property
+    def rotate_rad(self):
+        r'''
+        The rotation parameters (R1, R2, R3) in radians.
+        '''
+        return self._vector[4:7]
+
+
+    @property
+    def vector(self):
+        r'''
+        All seven parameters (T1, T2, T3, D, R1, R2, R3) as one
+        numpy.array.
+
+        **Examples**
+
+        >>> ParameterSet((0.01, 0.02, 0.03), 3.14e-9, [-0.1, -0.2, -0.3]).vector
+        array([  1.00000000e-02,   2.00000000e-02,   3.00000000e-02,
+                 3.14000000e-09,  -1.00000000e-01,  -2.00000000e-01,
+                -3.00000000e-01])
+        '''
+        return self._vector
 
 
     def __repr__(self):
-        return ('ParameterSet(translate_m = %r, term_d = %.4e, rotate_rad = %r)'
-                % (self.translate_m, self.term_d, self.rotate_rad))
+        return (f'ParameterSet(translate_m = {self.translate_m!r}, '
+                f'term_d = {self.term_d:.4e}, '
+                f'rotate_rad = {self.rotate_rad!r})')
+
+
+    def __str__(self):
+        r'''
+        A short form for logging, which avoids numpy's array
+        formatting.
+
+        **Examples**
+
+        >>> print(ParameterSet((0.01, 0.02, 0.03), 3.14e-9, [-0.1, -0.2, -0.3]))
+        ParameterSet(T = [0.01, 0.02, 0.03], D = 3.1400e-09, R = [-0.1, -0.2, -0.3])
+        '''
+        return (f'ParameterSet(T = {self.translate_m.tolist()}, '
+                f'D = {self.term_d:.4e}, '
+                f'R = {self.rotate_rad.tolist()})')
 
 
     def matrix(self):
@@ -107,23 +283,367 @@ class ParameterSet(object):
         array([[  3.14000000e-09,   3.00000000e-01,  -2.00000000e-01],
                [ -3.00000000e-01,   3.14000000e-09,   1.00000000e-01],
                [  2.00000000e-01,  -1.00000000e-01,   3.14000000e-09]])
+
+        The matrix is computed on the first call, and is read-only.
+        '''
+        if self._matrix is None:
+            self._matrix = transform_matrix(self.term_d, self.rotate_rad)
+            self._matrix.flags.writeable = False
+        return self._matrix
+
+
+    def full_matrix(self):
+        r'''
+        **Returns**
+
+        The matrix :math:`I + M`, where :math:`I` is the identity
+        matrix and :math:`M` the result of *matrix()*. The forward
+        transform of *xyz* is then simply *translate_m + dot(I + M,
+        xyz)*.
+
+        **Examples**
+
+        >>> ps = ParameterSet((0.01, 0.02, 0.03), 3.14e-9, [-0.1, -0.2, -0.3])
+        >>> ps.full_matrix()
+        array([[ 1. ,  0.3, -0.2],
+               [-0.3,  1. ,  0.1],
+               [ 0.2, -0.1,  1. ]])
+
+        Like *matrix()*, it is computed once, and is read-only.
+        '''
+        if self._full_matrix is None:
+            self._full_matrix = transform_matrix(1.0 + self.term_d,
+                                                 self.rotate_rad)
+            self._full_matrix.flags.writeable = False
+        return self._full_matrix
+
+
+    def affine_forward(self):
+        r'''
+        **Returns**
+
+        The forward transform as a tuple *(full_matrix, offset_m)*,
+        such that the transformed coordinates are *offset_m +
+        dot(full_matrix, xyz)*, or *matmul(xyz, full_matrix.T) +
+        offset_m* for an (N, 3) array. Here, *full_matrix* is
+        :math:`I + M` and *offset_m* is *translate_m*.
+
+        **Examples**
+
+        >>> ps = ParameterSet((0.01, 0.02, 0.03), 3.14e-9, [-0.1, -0.2, -0.3])
+        >>> full_matrix, offset_m = ps.affine_forward()
+        >>> full_matrix
+        array([[ 1. ,  0.3, -0.2],
+               [-0.3,  1. ,  0.1],
+               [ 0.2, -0.1,  1. ]])
+        >>> offset_m
+        array([ 0.01,  0.02,  0.03])
+        '''
+        return self.full_matrix(), self.translate_m.copy()
+
+
+    def affine_reverse(self):
+        r'''
+        **Returns**
+
+        The reverse transform as a tuple *(full_matrix, offset_m)*,
+        like *affine_forward()*. Here, *full_matrix* is :math:`I - M`,
+        the first order inverse of :math:`I + M`, and *offset_m* is
+        :math:`-(I - M) T`, so that subtracting the translation before
+        rotating is folded into the offset.
+
+        **Examples**
+
+        >>> ps = ParameterSet((0.01, 0.02, 0.03), 3.14e-9, [-0.1, -0.2, -0.3])
+        >>> full_matrix, offset_m = ps.affine_reverse()
+        >>> full_matrix
+        array([[ 1. , -0.3,  0.2],
+               [ 0.3,  1. , -0.1],
+               [-0.2,  0.1,  1. ]])
+        >>> offset_m
+        array([-0.01, -0.02, -0.03])
         '''
-        r_1, r_2, r_3 = self.rotate_rad
-        return array([[self.term_d, -r_3       ,  r_2],
-                      [r_3        , self.term_d, -r_1],
-                      [-r_2       , r_1        , self.term_d]])
+        full_matrix = transform_matrix(1.0 - self.term_d, -self.rotate_rad)
+        return full_matrix, -full_matrix.dot(self.translate_m)
+
+
+    def apply(self, xyz_m):
+        r'''
+        Applies the forward transform with these parameters to
+        *xyz_m*, that is, :math:`T + (I + M) x`. The parameters must
+        already be propagated to the epoch of the coordinates.
+
+        **Parameters**
+
+        xyz_m : sequence of 3 floats, or numpy.array of shape (N, 3)
+            The coordinates to transform in meters.
+
+        **Returns**
+
+        A numpy.array of the same shape as *xyz_m*.
+
+        **Examples**
+
+        >>> from math import pi
+        >>> mas = pi/(180.0*3600.0*1000.0)
+        >>> parameters = ParameterSet(array([54.0, 51.0, -48.0])*0.001, 0.0,
+        ...                           array([0.891, 5.390, -8.712])*mas)
+        >>> print('%.3f, %.3f, %.3f' %
+        ...       tuple(parameters.apply([3370658.542, 711877.138, 5349786.952])))
+        3370658.766, 711877.024, 5349786.819
+        '''
+        if ndim(xyz_m) != 1:
+            result = matmul(xyz_m, self.full_matrix().T)
+            result += self.translate_m
+            return result
+        x_m, y_m, z_m = asarray(xyz_m, dtype=float).tolist()
+        t_1, t_2, t_3, term_d, r_1, r_2, r_3 = self._vector.tolist()
+        x_new = x_m + t_1 - r_3*y_m + r_2*z_m
+        y_new = y_m + t_2 + r_3*x_m - r_1*z_m
+        z_new = z_m + t_3 - r_2*x_m + r_1*y_m
+        # D is exactly zero for several ITRF realisations.
+        if term_d != 0.0:
+            x_new += term_d*x_m
+            y_new += term_d*y_m
+            z_new += term_d*z_m
+        return array([x_new, y_new, z_new])
 
 
     def __mul__(self, number):
-        return ParameterSet(translate_m = self.translate_m * number,
-                            term_d      = self.term_d      * number,
-                            rotate_rad  = self.rotate_rad  * number)
+        return ParameterSet._from_vector(self._vector * number)
 
     def __add__(self, parameter_set):
-        other = parameter_set
-        return ParameterSet(translate_m = self.translate_m + other.translate_m,
-                            term_d      = self.term_d      + other.term_d,
-                            rotate_rad  = self.rotate_rad  + other.rotate_rad)
-        
+        # Leaves parameter_set + parameter_set_array to
+        # ParameterSetArray.__radd__().
+        if not isinstance(parameter_set, ParameterSet):
+            return NotImplemented
+        return ParameterSet._from_vector(self._vector + parameter_set.vector)
+
+
+
+class ParameterSetArray(object):
+    r'''
+    A ParameterSetArray holds many sets of the seven parameters, for
+    example a ParameterSet propagated to many epochs, in one numpy
+    array of shape S + (7,) instead of a list of ParameterSet
+    objects. Arithmetic and the matrices are computed for all sets at
+    once.
+
+    **Parameters**
+
+    translate_m : numpy.array of shape S + (3,)
+        The translation parameters T1, T2, and T3 in units of meters.
+
+    term_d : numpy.array of shape S
+        The terms D.
+
+    rotate_rad : numpy.array of shape S + (3,)
+        The rotation parameters R1, R2, and R3 in units of radians.
+
+    **Examples**
+
+    >>> psa = ParameterSetArray(array([[0.01, 0.02, 0.03], [0.1, 0.2, 0.3]]),
+    ...                         array([3.14e-9, 0.0]),
+    ...                         array([[-0.1, -0.2, -0.3], [0.1, 0.2, 0.3]]))
+    >>> len(psa), psa.shape
+    (2, (2,))
+    >>> psa[1]
+    ParameterSet(translate_m = array([ 0.1,  0.2,  0.3]), term_d = 0.0000e+00, rotate_rad = array([ 0.1,  0.2,  0.3]))
+    >>> (psa*2.0 + psa).term_d
+    array([  9.42000000e-09,   0.00000000e+00])
+    >>> (psa[0] + psa).term_d
+    array([  6.28000000e-09,   3.14000000e-09])
+    >>> psa.matrices().shape
+    (2, 3, 3)
+
+    Propagating a ParameterSet to many epochs at once:
+
+    >>> parameters = ParameterSet((0.0521, 0.0493, -0.0585), 1.34e-9,
+    ...                           (4.3e-9, 2.6e-8, -4.2e-8))
+    >>> rates      = ParameterSet((0.0001, 0.0001, -0.0018), 0.08e-9,
+    ...                           (3.9e-10, 2.4e-9, -3.8e-9))
+    >>> ParameterSetArray.propagate(parameters, rates,
+    ...                             array([2000.0, 2010.0]) - 2000.0).translate_m
+    array([[ 0.0521,  0.0493, -0.0585],
+           [ 0.0531,  0.0503, -0.0765]])
+    '''
+
+    __slots__ = ('_vectors',)
+
+    def __init__(self, translate_m, term_d, rotate_rad):
+        term_d   = asarray(term_d, dtype=float)
+        vectors  = empty(term_d.shape + (7,))
+        vectors[..., 0:3] = translate_m
+        vectors[..., 3]   = term_d
+        vectors[..., 4:7] = rotate_rad
+        vectors.flags.writeable = False
+        self._vectors = vectors
+
+
+    @classmethod
+    def _from_vectors(cls, vectors):
+        r'''
+        Create a ParameterSetArray from a numpy.array *vectors* of
+        shape S + (7,), without copying it. *vectors* is made
+        read-only.
+        '''
+        parameter_sets = object.__new__(cls)
+        vectors.flags.writeable  = False
+        parameter_sets._vectors  = vectors
+        return parameter_sets
+
+
+    @classmethod
+    def from_parameter_sets(cls, parameter_sets):
+        r'''
+        **Returns**
+
+        A ParameterSetArray of shape (N,) holding the N ParameterSet
+        instances in the sequence *parameter_sets*.
+        '''
+        return cls._from_vectors(array([ps.vector for ps in parameter_sets],
+                                       dtype=float).reshape(-1, 7))
+
+
+    @classmethod
+    def propagate(cls, parameters, rates, years):
+        r'''
+        **Returns**
+
+        The ParameterSetArray *parameters + rates*years* for an array
+        of time differences *years*, with *parameters* and *rates*
+        ParameterSet instances.
+        '''
+        years = asarray(years, dtype=float)[..., None]
+        return cls._from_vectors(parameters.vector + rates.vector*years)
+
+
+    @property
+    def shape(self):
+        r'''
+        The shape S of the array of parameter sets.
+        '''
+        return self._vectors.shape[:-1]
+
+
+    @property
+    def translate_m(self):
+        r'''
+        The translation parameters, shape S + (3,), in meters.
+        '''
+        return self._vectors[..., 0:3]
+
+
+    @property
+    def term_d(self):
+        r'''
+        The terms D, shape S.
+        '''
+        return self._vectors[..., 3]
+
+
+    @property
+    def rotate_rad(self):
+        r'''
+        The rotation parameters, shape S + (3,), in radians.
+        '''
+        return self._vectors[..., 4:7]
+
+
+    @property
+    def vectors(self):
+        r'''
+        All parameters as one numpy.array of shape S + (7,).
+        '''
+        return self._vectors
+
+
+    def __len__(self):
+        return len(self._vectors)
+
+
+    def __getitem__(self, index):
+        vectors = self._vectors[index]
+        if ndim(vectors) == 1:
+            return ParameterSet._from_vector(vectors)
+        return ParameterSetArray._from_vectors(vectors)
+
+
+    def __repr__(self):
+        return f'ParameterSetArray(shape = {self.shape!r})'
+
+
+    def matrices(self):
+        r'''
+        **Returns**
+
+        The matrices :math:`M` of all parameter sets, as a
+        numpy.array of shape S + (3, 3).
+        '''
+        return transform_matrices(self.term_d, self.rotate_rad)
+
+
+    def full_matrices(self):
+        r'''
+        **Returns**
+
+        The matrices :math:`I + M` of all parameter sets, as a
+        numpy.array of shape S + (3, 3).
+        '''
+        return transform_matrices(1.0 + self.term_d, self.rotate_rad)
+
+
+    def apply(self, xyz_m):
+        r'''
+        Applies the forward transform of each parameter set to its own
+        coordinate, like *ParameterSet.apply()*.
+
+        **Parameters**
+
+        xyz_m : numpy.array of shape S + (3,)
+            The coordinates to transform in meters. It is broadcast
+            against the shape S of the ParameterSetArray, so a single
+            coordinate of shape (3,) is transformed with every set.
+
+        **Returns**
+
+        A numpy.array of the broadcast shape with a last axis of
+        length 3.
+
+        **Examples**
+
+        >>> parameters = ParameterSet((0.0521, 0.0493, -0.0585), 1.34e-9,
+        ...                           (4.3e-9, 2.6e-8, -4.2e-8))
+        >>> psa = ParameterSetArray.from_parameter_sets([parameters]*2)
+        >>> for xyz in psa.apply([3370658.542, 711877.138, 5349786.952]):
+        ...     print('%.3f, %.3f, %.3f' % tuple(xyz))
+        3370658.768, 711877.024, 5349786.816
+        3370658.768, 711877.024, 5349786.816
+        '''
+        xyz_m = asarray(xyz_m, dtype=float)
+        if self._vectors[..., 0].size < UNROLLED_MIN_SETS:
+            result  = einsum('...ij,...j->...i', self.full_matrices(), xyz_m)
+            result += self.translate_m
+            return result
+        t_1, t_2, t_3, term_d, r_1, r_2, r_3 = moveaxis(self._vectors, -1, 0)
+        x_m, y_m, z_m = xyz_m[..., 0], xyz_m[..., 1], xyz_m[..., 2]
+        scale  = 1.0 + term_d
+        result = empty(broadcast(scale, x_m).shape + (3,))
+        result[..., 0] = t_1 + scale*x_m - r_3*y_m + r_2*z_m
+        result[..., 1] = t_2 + r_3*x_m + scale*y_m - r_1*z_m
+        result[..., 2] = t_3 - r_2*x_m + r_1*y_m + scale*z_m
+        return result
+
+
+    def __mul__(self, number):
+        return ParameterSetArray._from_vectors(
+            self._vectors * asarray(number)[..., None])
 
+    def __add__(self, parameter_sets):
+        if isinstance(parameter_sets, ParameterSet):
+            vectors = parameter_sets.vector
+        else:
+            vectors = parameter_sets.vectors
+        return ParameterSetArray._from_vectors(self._vectors + vectors)
 
+    __radd__ = __add__